@@ -2,7 +2,8 @@
 
 import enum
 import pprint
-from typing import Tuple, Optional, List, NamedTuple
+import types
+from typing import Tuple, Optional, List, NamedTuple, Dict, Mapping
 
 __author__ = 'Tomas Novacik'
 
@@ -30,8 +31,10 @@ class Move:
             .format(self.x, self.y, self.player_type)
 
 
+# width and height set to None stand for unbounded board (SparseBoard only)
 BoardSpec = NamedTuple("BoardSpec",
-                       [("width", int), ("height", int), ("winning_count", int)])
+                       [("width", Optional[int]), ("height", Optional[int]),
+                        ("winning_count", int)])
 
 class Board:
     """Board representation"""
@@ -85,6 +88,15 @@ class Board:
     def board(self) -> []:
         return self._board
 
+    @property
+    def stones(self) -> Mapping[BoardCoord, str]:
+        """Read only mapping of placed stones"""
+        return types.MappingProxyType(
+            {(x, y): value
+             for x, row in enumerate(self._board)
+             for y, value in enumerate(row)
+             if value != self.EMPTY_FIELD_VALUE})
+
     def get_field(self, x:int, y:int) -> PlayerType:
         return PlayerType(self.board[x][y])
 
@@ -178,4 +190,151 @@ class Board:
 
         return Board(self.spec, new_board, new_available_moves)
 
+
+class SparseBoard:
+    """
+    Sparse board representation
+
+    Only placed stones are stored so memory, clone and win detection cost
+    depend on the number of stones instead of the board area. Board may be
+    unbounded (width and height of the spec set to None).
+
+    Available moves are limited to the empty fields in the neighbourhood of
+    already placed stones, the very first move is placed to the board center.
+    """
+
+    # constants
+    DEFAULT_NEIGHBOURHOOD = 2
+    EMPTY_FIELD_VALUE = Board.EMPTY_FIELD_VALUE
+    DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+    def __init__(self, spec: Optional[BoardSpec] = None,
+                 stones: Optional[Dict[BoardCoord, str]] = None,
+                 available_moves: Optional[BoardCoordList] = None,
+                 neighbourhood: int = DEFAULT_NEIGHBOURHOOD):
+        self.spec = spec
+        if spec:
+            self.width = spec.width
+            self.height = spec.height
+            self.winning_move_count = spec.winning_count
+        else:
+            self.width = Board.DEFAULT_WIDTH
+            self.height = Board.DEFAULT_HEIGHT
+            self.winning_move_count = Board.DEFAULT_WINNING_MOVE_COUNT
+
+        self.neighbourhood = neighbourhood
+        self._stones = {} if stones is None else stones
+
+        if available_moves is None:
+            available_moves = [] if self._stones else [self._get_center()]
+        self.available_moves = available_moves
+        # position of each available move for constant time removal
+        self._move_index = {m: i for i, m in enumerate(self.available_moves)}
+
+    def __str__(self):
+        if not self._stones:
+            return "SparseBoard(width = {}, height = {})"\
+                .format(self.width, self.height)
+
+        min_x = min(x for x, _ in self._stones)
+        max_x = max(x for x, _ in self._stones)
+        min_y = min(y for _, y in self._stones)
+        max_y = max(y for _, y in self._stones)
+
+        rows = [[self._stones.get((x, y), self.EMPTY_FIELD_VALUE)
+                 for y in range(min_y, max_y + 1)]
+                for x in range(min_x, max_x + 1)]
+
+        return "SparseBoard(width = {}, height = {}, origin = {})\n{}"\
+            .format(self.width, self.height, (min_x, min_y),
+                    "\n".join([pprint.pformat(row) for row in rows]))
+
+    # private methods
+
+    def _get_center(self) -> BoardCoord:
+        if self.is_unbounded:
+            return 0, 0
+        return self.width // 2, self.height // 2
+
+    def _is_on_board(self, x: int, y: int) -> bool:
+        if self.is_unbounded:
+            return True
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def _remove_available_move(self, coord: BoardCoord):
+        index = self._move_index.pop(coord, None)
+        if index is None:
+            return
+
+        last_move = self.available_moves.pop()
+        if index < len(self.available_moves):
+            self.available_moves[index] = last_move
+            self._move_index[last_move] = index
+
+    def _add_neighbourhood(self, coord: BoardCoord):
+        x, y = coord
+        span = range(-self.neighbourhood, self.neighbourhood + 1)
+        for dx in span:
+            for dy in span:
+                new_coord = x + dx, y + dy
+                if new_coord in self._stones or new_coord in self._move_index:
+                    continue
+                if not self._is_on_board(*new_coord):
+                    continue
+                self._move_index[new_coord] = len(self.available_moves)
+                self.available_moves.append(new_coord)
+
+    def _count_direction(self, move: Move, dx: int, dy: int) -> int:
+        count = 0
+        x, y = move.x + dx, move.y + dy
+        while count < self.winning_move_count and\
+                self._stones.get((x, y)) == move.player_type.value:
+            count += 1
+            x, y = x + dx, y + dy
+
+        return count
+
+    # public methods
+
+    @property
+    def is_unbounded(self) -> bool:
+        return self.width is None or self.height is None
+
+    def place_move(self, move: Move):
+        if not self._is_on_board(move.x, move.y):
+            raise InvalidMoveException(
+                "Attempting move:{} beyond the board boarders: {}, {}"
+                    .format(move, move.x, move.y))
+
+        coord = move.x, move.y
+        if coord in self._stones:
+            raise InvalidMoveException(
+                "Attempting move {} but field is already occupied by: {}"
+                    .format(move, self._stones[coord]))
+
+        self._stones[coord] = move.player_type.value
+        self._remove_available_move(coord)
+        self._add_neighbourhood(coord)
+
+    @property
+    def stones(self) -> Mapping[BoardCoord, str]:
+        """Read only mapping of placed stones"""
+        return types.MappingProxyType(self._stones)
+
+    def get_field(self, x: int, y: int) -> PlayerType:
+        return PlayerType(self._stones.get((x, y), self.EMPTY_FIELD_VALUE))
+
+    def is_winning_move(self, move: Move) -> bool:
+        for dx, dy in self.DIRECTIONS:
+            count = 1 + self._count_direction(move, dx, dy) +\
+                    self._count_direction(move, -dx, -dy)
+            if count >= self.winning_move_count:
+                return True
+
+        return False
+
+    def clone(self):
+        return SparseBoard(self.spec, self._stones.copy(),
+                           self.available_moves.copy(), self.neighbourhood)
+
 # eof
\ No newline at end of file
@@ -2,7 +2,8 @@
 
 import unittest2
 
-from board import PlayerType, Move, Board, InvalidMoveException, BoardSpec
+from board import PlayerType, Move, Board, InvalidMoveException, BoardSpec,\
+    SparseBoard
 
 __author__ = 'Tomas Novacik'
 
@@ -148,4 +149,78 @@ class BoardTest(unittest2.TestCase):
 
     def tearDown(self):
         self.test_board = None
+
+
+class SparseBoardTest(unittest2.TestCase):
+
+    def setUp(self):
+        board_spec = BoardSpec(50, 50, 5)
+        self.test_board = SparseBoard(board_spec)
+
+    def test_first_move_in_center(self):
+        self.assertEqual(self.test_board.available_moves, [(25, 25)])
+
+    def test_available_moves_neighbourhood(self):
+        self.test_board.place_move(Move(0, 0, PlayerType.CIRCLE))
+
+        # 3x3 corner of the 5x5 neighbourhood without the placed stone
+        # and the untouched board center
+        self.assertEqual(len(self.test_board.available_moves), 9)
+        self.assertNotIn((0, 0), self.test_board.available_moves)
+
+    def test_placing_invalid_move(self):
+        self.test_board.place_move(Move(1, 1, PlayerType.CROSS))
+
+        with self.assertRaises(InvalidMoveException):
+            self.test_board.place_move(Move(1, 1, PlayerType.CIRCLE))
+
+    def test_placing_move_outside_board(self):
+        with self.assertRaises(InvalidMoveException):
+            self.test_board.place_move(Move(50, 0, PlayerType.CIRCLE))
+
+    def test_is_winning_move(self):
+        for dx, dy in SparseBoard.DIRECTIONS:
+            board = self.test_board.clone()
+            for i in [0, 1, 3, 4]:
+                board.place_move(Move(20 + i * dx, 20 + i * dy,
+                                      PlayerType.CIRCLE))
+
+            winning_move = Move(20 + 2 * dx, 20 + 2 * dy, PlayerType.CIRCLE)
+            board.place_move(winning_move)
+
+            self.assertTrue(board.is_winning_move(winning_move))
+
+    def test_is_not_winning_move(self):
+        for i in range(3):
+            self.test_board.place_move(Move(i, 0, PlayerType.CIRCLE))
+        self.test_board.place_move(Move(3, 0, PlayerType.CROSS))
+
+        not_winning_move = Move(4, 0, PlayerType.CIRCLE)
+        self.test_board.place_move(not_winning_move)
+
+        self.assertFalse(self.test_board.is_winning_move(not_winning_move))
+
+    def test_unbounded_board(self):
+        board = SparseBoard(BoardSpec(None, None, 5))
+        for i in range(4):
+            board.place_move(Move(-10 ** 6, -i, PlayerType.CROSS))
+
+        winning_move = Move(-10 ** 6, 1, PlayerType.CROSS)
+        board.place_move(winning_move)
+
+        self.assertTrue(board.is_winning_move(winning_move))
+        self.assertEqual(len(board.stones), 5)
+
+    def test_clone(self):
+        self.test_board.place_move(Move(25, 25, PlayerType.CIRCLE))
+        board = self.test_board.clone()
+        board.place_move(Move(26, 26, PlayerType.CROSS))
+
+        with self.assertRaises(TypeError):
+            board.stones[(0, 0)] = PlayerType.CROSS.value
+
+        self.assertIn((26, 26), self.test_board.available_moves)
+        self.assertNotIn((26, 26), board.available_moves)
+        self.assertEqual(len(self.test_board.stones), 1)
+
 # eof
@@ -3,8 +3,8 @@
 __author__ = 'Tomas Novacik'
 
 
-from board import PlayerType, Board, Move, BoardSpec
-from typing import Optional
+from board import PlayerType, Board, Move, BoardSpec, BoardCoord
+from typing import Optional, Type, List
 
 
 class GameException(Exception):
@@ -26,12 +26,21 @@ class Game(object):
                  is_finished:Optional[bool] = None,
                  player_move:Optional[PlayerType] = None,
                  winning_player:Optional[PlayerType] = None,
-                board_spec:Optional[BoardSpec] = None):
+                board_spec:Optional[BoardSpec] = None,
+                 board_class:Type = Board,
+                 moves:Optional[List[BoardCoord]] = None):
+        """
+        :param board_class: board implementation created on game start,
+            Board or SparseBoard
+        :param moves: history of moves played so far
+        """
         self._board = board
         self.is_finished = is_finished
         self._player_move = player_move
         self.winning_player = winning_player
         self._board_spec = board_spec
+        self._board_class = board_class
+        self.moves = [] if moves is None else moves
 
     def _set_next_player_move(self):
         if self._player_move == PlayerType.CIRCLE:
@@ -48,7 +57,8 @@ class Game(object):
         return self._board
 
     def start(self):
-        self._board = Board(self._board_spec)
+        self._board = self._board_class(self._board_spec)
+        self.moves = []
         self.is_finished = False
         self._player_move = PlayerType.CIRCLE
 
@@ -59,6 +69,7 @@ class Game(object):
         move = Move(x, y, self._player_move)
 
         self._board.place_move(move)
+        self.moves.append((x, y))
 
         if self._board.is_winning_move(move):
             self.is_finished = True
@@ -75,5 +86,5 @@ class Game(object):
 
     def clone(self):
         return Game(self._board.clone(), self.is_finished, self._player_move,
-                    self.winning_player)
+                    self.winning_player, moves=self.moves.copy())
 # eof
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+
+__author__ = 'Tomas Novacik'
+
+import fcntl
+import os
+import struct
+
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from board import BoardCoord, BoardSpec, PlayerType
+
+# root visit counts of all searched moves for one played move
+MoveVisits = List[Tuple[BoardCoord, int]]
+
+GameRecord = NamedTuple("GameRecord",
+                        [("board_spec", BoardSpec),
+                         ("moves", List[BoardCoord]),
+                         ("visits", List[MoveVisits]),
+                         ("winning_player", Optional[PlayerType])])
+
+
+class GameRecordException(Exception):
+    pass
+
+
+# record layout: length prefix followed by the header, moves and visits
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<iiHBI")
+MOVE = struct.Struct("<iiI")
+VISIT = struct.Struct("<iiI")
+# index entry: record offset in the log and its length
+INDEX_ENTRY = struct.Struct("<QI")
+
+UNBOUNDED = -1
+WINNERS = [None, PlayerType.CIRCLE, PlayerType.CROSS]
+
+
+def get_index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def encode_record(record: GameRecord) -> bytes:
+    if len(record.moves) != len(record.visits):
+        raise GameRecordException("Visits missing for some of the moves.")
+
+    width, height, winning_count = record.board_spec
+    data = [HEADER.pack(UNBOUNDED if width is None else width,
+                        UNBOUNDED if height is None else height,
+                        winning_count,
+                        WINNERS.index(record.winning_player),
+                        len(record.moves))]
+
+    for (x, y), visits in zip(record.moves, record.visits):
+        data.append(MOVE.pack(x, y, len(visits)))
+        data.extend(VISIT.pack(vx, vy, n) for (vx, vy), n in visits)
+
+    payload = b"".join(data)
+    return LENGTH.pack(len(payload)) + payload
+
+
+def decode_record(payload: bytes) -> GameRecord:
+    width, height, winning_count, winner, move_count =\
+        HEADER.unpack_from(payload)
+    offset = HEADER.size
+
+    moves = []
+    visits = []
+    for _ in range(move_count):
+        x, y, visit_count = MOVE.unpack_from(payload, offset)
+        offset += MOVE.size
+
+        move_visits = []
+        for _ in range(visit_count):
+            vx, vy, n = VISIT.unpack_from(payload, offset)
+            offset += VISIT.size
+            move_visits.append(((vx, vy), n))
+
+        moves.append((x, y))
+        visits.append(move_visits)
+
+    board_spec = BoardSpec(None if width == UNBOUNDED else width,
+                           None if height == UNBOUNDED else height,
+                           winning_count)
+
+    return GameRecord(board_spec, moves, visits, WINNERS[winner])
+
+
+class GameRecordWriter:
+    """
+    Append only writer of game records.
+
+    Records are appended to the log file, their offsets to the index file.
+    Writing is guarded by an exclusive lock on the log so any number of
+    writers (processes) can append to the same log. Record is valid only
+    once its index entry is written, leftovers of a writer killed in the
+    middle of append are truncated before the next append.
+    """
+
+    def __init__(self, path: str):
+        flags = os.O_RDWR | os.O_APPEND | os.O_CREAT
+        self._log_fd = os.open(path, flags, 0o644)
+        self._index_fd = os.open(get_index_path(path), flags, 0o644)
+
+    @staticmethod
+    def _write(fd: int, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    def _truncate_incomplete(self) -> int:
+        """Drop partial index entry and not indexed data, returns log end"""
+        index_size = os.fstat(self._index_fd).st_size
+        if index_size % INDEX_ENTRY.size:
+            index_size -= index_size % INDEX_ENTRY.size
+            os.ftruncate(self._index_fd, index_size)
+
+        end = 0
+        if index_size:
+            offset, length = INDEX_ENTRY.unpack(
+                os.pread(self._index_fd, INDEX_ENTRY.size,
+                         index_size - INDEX_ENTRY.size))
+            end = offset + length
+
+        if os.fstat(self._log_fd).st_size != end:
+            os.ftruncate(self._log_fd, end)
+
+        return end
+
+    def append(self, record: GameRecord):
+        data = encode_record(record)
+
+        fcntl.flock(self._log_fd, fcntl.LOCK_EX)
+        try:
+            offset = self._truncate_incomplete()
+            self._write(self._log_fd, data)
+            self._write(self._index_fd, INDEX_ENTRY.pack(offset, len(data)))
+        finally:
+            fcntl.flock(self._log_fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self._log_fd)
+        os.close(self._index_fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GameRecordReader:
+    """
+    Lazy reader of game records.
+
+    Only records with an index entry are read, iteration follows the index
+    one record at a time, indexing uses it for random access.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def __len__(self):
+        return os.path.getsize(get_index_path(self._path)) // INDEX_ENTRY.size
+
+    def __getitem__(self, index: int) -> GameRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Game record index out of range.")
+
+        with open(get_index_path(self._path), "rb") as f:
+            f.seek(index * INDEX_ENTRY.size)
+            offset, length = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+
+        with open(self._path, "rb") as f:
+            f.seek(offset + LENGTH.size)
+            return decode_record(f.read(length - LENGTH.size))
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        with open(get_index_path(self._path), "rb") as index,\
+                open(self._path, "rb") as log:
+            while True:
+                entry = index.read(INDEX_ENTRY.size)
+                if len(entry) < INDEX_ENTRY.size:
+                    break
+
+                offset, length = INDEX_ENTRY.unpack(entry)
+                log.seek(offset + LENGTH.size)
+                yield decode_record(log.read(length - LENGTH.size))
+
+# eof
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import unittest2
+
+from board import BoardSpec, PlayerType
+from game_record import GameRecord, GameRecordReader, GameRecordWriter,\
+    encode_record, get_index_path
+from self_play import self_play
+from utc import UTC
+
+__author__ = 'Tomas Novacik'
+
+
+def _write_records(path, count, winning_player):
+    with GameRecordWriter(path) as writer:
+        for i in range(count):
+            writer.append(GameRecord(BoardSpec(None, None, 5), [(-i, i)],
+                                     [[((-i, i), i)]], winning_player))
+
+
+class GameRecordTest(unittest2.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "games.log")
+
+    def test_write_and_read(self):
+        records = [
+            GameRecord(BoardSpec(3, 3, 3), [(0, 0), (1, 1)],
+                       [[((0, 0), 3), ((2, 2), 1)], []], PlayerType.CROSS),
+            GameRecord(BoardSpec(None, None, 5), [(-5, 7)], [[((-5, 7), 2)]],
+                       None),
+        ]
+
+        with GameRecordWriter(self.path) as writer:
+            for record in records:
+                writer.append(record)
+
+        reader = GameRecordReader(self.path)
+
+        self.assertEqual(len(reader), 2)
+        self.assertEqual(list(reader), records)
+        self.assertEqual(reader[1], records[1])
+        self.assertEqual(reader[-2], records[0])
+
+    def test_parallel_writers(self):
+        workers = [multiprocessing.Process(target=_write_records,
+                                           args=(self.path, 50, player))
+                   for player in [PlayerType.CROSS, PlayerType.CIRCLE]]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        reader = GameRecordReader(self.path)
+        records = list(reader)
+
+        self.assertEqual(len(reader), 100)
+        self.assertEqual(len(records), 100)
+        self.assertEqual(
+            sum(r.winning_player == PlayerType.CROSS for r in records), 50)
+        self.assertEqual([reader[i] for i in range(100)], records)
+
+    def test_killed_writer(self):
+        _write_records(self.path, 2, PlayerType.CROSS)
+
+        # writer killed in the middle of a record and of an index entry
+        with open(self.path, "ab") as f:
+            f.write(encode_record(GameRecord(BoardSpec(3, 3, 3), [(0, 0)],
+                                             [[]], None))[:7])
+        with open(get_index_path(self.path), "ab") as f:
+            f.write(b"\x01\x02")
+
+        reader = GameRecordReader(self.path)
+        self.assertEqual(len(reader), 2)
+        self.assertEqual(len(list(reader)), 2)
+
+        _write_records(self.path, 3, PlayerType.CIRCLE)
+
+        records = list(reader)
+        self.assertEqual(len(reader), 5)
+        self.assertEqual(records, [reader[i] for i in range(5)])
+        self.assertEqual([r.winning_player for r in records],
+                         [PlayerType.CROSS] * 2 + [PlayerType.CIRCLE] * 3)
+
+    def test_self_play(self):
+        board_spec = BoardSpec(3, 3, 3)
+        with GameRecordWriter(self.path) as writer:
+            for record in self_play(board_spec, UTC(iteration_limit=20), 2):
+                writer.append(record)
+
+        for record in GameRecordReader(self.path):
+            self.assertEqual(record.board_spec, board_spec)
+            self.assertEqual(len(record.moves), len(record.visits))
+            self.assertEqual(len(set(record.moves)), len(record.moves))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+# eof
@@ -6,7 +6,7 @@ __author__ = 'Tomas Novacik'
 import unittest2
 
 from game import Game
-from board import Board, PlayerType, Move
+from board import Board, PlayerType, Move, SparseBoard, BoardSpec
 
 
 class GameTest(unittest2.TestCase):
@@ -30,4 +30,25 @@ class GameTest(unittest2.TestCase):
         game.start()
 
         game.clone()
+
+    def test_move_history(self):
+        game = Game()
+        game.start()
+        game.move(1, 2)
+
+        new_game = game.clone()
+        new_game.move(3, 4)
+
+        self.assertEqual(game.moves, [(1, 2)])
+        self.assertEqual(new_game.moves, [(1, 2), (3, 4)])
+
+    def test_sparse_board_draw(self):
+        game = Game(board_spec=BoardSpec(2, 2, 3), board_class=SparseBoard)
+        game.start()
+
+        while not game.is_finished:
+            game.move(*game.available_moves[0])
+
+        self.assertEqual(len(game.board.stones), 4)
+        self.assertIsNone(game.winning_player)
 # eof
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-from board import BoardSpec
+from board import BoardSpec, Board, SparseBoard
 
 __author__ = 'Tomas Novacik'
 
@@ -7,13 +7,14 @@ import argparse
 import logging
 
 from game import Game
+from opening_book import OpeningBook
 from utc import UTC
 
 
-def start_game(with_bot):
+def start_game(with_bot, opening_book=None):
     utc = None
     if with_bot:
-        utc = UTC(10)
+        utc = UTC(10, opening_book=opening_book)
 
     game = Game(board_spec=BoardSpec(10, 10, 5))
 
@@ -46,17 +47,60 @@ def start_game(with_bot):
 
         move_num += 1
 
+def start_arena(board_spec, sparse, time_limit, opening_book=None):
+    """Let two bots play against each other"""
+    utc = UTC(time_limit, opening_book=opening_book)
+
+    game = Game(board_spec=board_spec,
+                board_class=SparseBoard if sparse else Board)
+
+    game.start()
+
+    while not game.is_finished:
+        x, y = utc.get_move(game)
+        print("Player {} moves: {}, {}".format(game.player_move, x, y))
+        game.move(x, y)
+
+    print("Game status:")
+    print(game.board)
+    print("Player {} won.".format(game.winning_player))
+
+
 def main():
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-w", "--with-bot", help="Player 2 will be bot",
                     action="store_true", default = False)
+    parser.add_argument("-a", "--arena", help="Bot plays against bot",
+                    action="store_true", default = False)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--winning-count", type=int, default=5)
+    parser.add_argument("--unbounded", help="Unbounded board (implies sparse)",
+                    action="store_true", default = False)
+    parser.add_argument("--sparse", help="Use sparse board representation",
+                    action="store_true", default = False)
+    parser.add_argument("--time-limit", type=float,
+                    default=UTC.DEFAULT_TIME_LIMIT)
+    parser.add_argument("--opening-book", help="Opening book file")
 
     args = parser.parse_args()
 
     logging.getLogger().setLevel(logging.DEBUG)
 
-    start_game(args.with_bot)
+    opening_book = None
+    if args.opening_book:
+        opening_book = OpeningBook(args.opening_book)
+
+    if args.arena:
+        if args.unbounded:
+            board_spec = BoardSpec(None, None, args.winning_count)
+        else:
+            board_spec = BoardSpec(args.width, args.height, args.winning_count)
+        start_arena(board_spec, args.sparse or args.unbounded, args.time_limit,
+                    opening_book)
+    else:
+        start_game(args.with_bot, opening_book)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+
+__author__ = 'Tomas Novacik'
+
+import sys
+
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Collection, List, Optional, Sequence, Tuple
+
+from board import BoardCoord
+from game import Game
+
+# features of available moves and target probabilities of one position
+TrainingSample = Tuple[np.ndarray, np.ndarray]
+
+
+class UntriedMoves:
+    """
+    Not yet expanded moves of a search node sorted by prior.
+
+    Moves and priors are stored in two arrays in ascending prior order,
+    moves below the cursor are untried, popped moves stay above it so they
+    can be pushed back when their subtree is pruned.
+    """
+
+    __slots__ = ("_moves", "_priors", "_count")
+
+    def __init__(self, moves: Sequence[BoardCoord], priors: np.ndarray):
+        order = np.argsort(priors, kind="stable")
+        self._moves = np.array(moves, dtype=np.int32).reshape(-1, 2)[order]
+        self._priors = np.asarray(priors, dtype=np.float32)[order]
+        self._count = len(order)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def memory(self) -> int:
+        # arrays own their data, so their size includes the buffers
+        return sys.getsizeof(self) + sys.getsizeof(self._moves) +\
+            sys.getsizeof(self._priors)
+
+    @property
+    def top_prior(self) -> float:
+        return float(self._priors[self._count - 1])
+
+    def pop(self) -> Tuple[BoardCoord, float]:
+        """Remove and return the untried move of the highest prior"""
+        self._count -= 1
+        x, y = self._moves[self._count].tolist()
+        return (x, y), float(self._priors[self._count])
+
+    def push(self, move: BoardCoord):
+        """Return popped move back among the untried moves"""
+        popped = self._moves[self._count:]
+        index = self._count + int(np.flatnonzero(
+            (popped[:, 0] == move[0]) & (popped[:, 1] == move[1]))[0])
+
+        # popped moves have higher prior than all the untried ones, placing
+        # the move right above them keeps the order
+        for array in (self._moves, self._priors):
+            array[[self._count, index]] = array[[index, self._count]]
+        self._count += 1
+
+
+class MovePrior:
+    """
+    Local pattern move prior.
+
+    Every available move is described by the stones in its 5x5 neighbourhood
+    (each of the 8 adjacent fields, stone counts of the outer ring and share
+    of the neighbourhood lying on the board), move probabilities are softmax
+    of a linear function of the features - multinomial logistic regression.
+    """
+
+    RADIUS = 2
+    FEATURE_COUNT = 20
+    # prefer moves next to stones and away from the board edges
+    DEFAULT_WEIGHTS = np.array([1.0] * 16 + [0.3, 0.3, 4.0, 0.0])
+
+    def __init__(self, weights: Optional[np.ndarray] = None):
+        self.weights = self.DEFAULT_WEIGHTS.copy() if weights is None\
+            else np.asarray(weights, dtype=float)
+
+    @classmethod
+    def load(cls, path: str) -> "MovePrior":
+        return cls(np.load(path))
+
+    def save(self, path: str):
+        np.save(path, self.weights)
+
+    @classmethod
+    def get_features(cls, game: Game,
+                     moves: Sequence[BoardCoord]) -> np.ndarray:
+        """Features of given moves for player on the move, shape (moves, F)"""
+        board = game.board
+        radius = cls.RADIUS
+        size = 2 * radius + 1
+
+        coords = np.array(moves, dtype=int).reshape(-1, 2)
+        min_x, min_y = coords.min(axis=0) - radius
+        max_x, max_y = coords.max(axis=0) + radius
+
+        # own stones, opponent stones, fields on board
+        planes = np.zeros((3, max_x - min_x + 1, max_y - min_y + 1))
+
+        for (x, y), value in board.stones.items():
+            if min_x <= x <= max_x and min_y <= y <= max_y:
+                own = value == game.player_move.value
+                planes[0 if own else 1, x - min_x, y - min_y] = 1
+
+        if board.width is None or board.height is None:
+            planes[2] = 1
+        else:
+            planes[2, max(0, -min_x):board.width - min_x,
+                      max(0, -min_y):board.height - min_y] = 1
+
+        windows = sliding_window_view(planes, (size, size), axis=(1, 2))
+        # shape (3, moves, size, size)
+        windows = windows[:, coords[:, 0] - min_x - radius,
+                          coords[:, 1] - min_y - radius]
+
+        inner = windows[:2, :, radius - 1:radius + 2, radius - 1:radius + 2]
+        inner = inner.reshape(2, len(coords), 9)
+        neighbours = np.delete(inner, 4, axis=2)
+        ring = windows[:2].sum(axis=(2, 3)) - inner.sum(axis=2)
+
+        return np.column_stack([neighbours[0], neighbours[1],
+                                ring[0], ring[1],
+                                windows[2].mean(axis=(1, 2)),
+                                np.ones(len(coords))])
+
+    def get_probabilities(self, features: np.ndarray) -> np.ndarray:
+        logits = features @ self.weights
+        logits -= logits.max()
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum()
+
+    def get_priors(self, game: Game) -> List[Tuple[BoardCoord, float]]:
+        moves = list(game.available_moves)
+        probabilities = self.get_probabilities(self.get_features(game, moves))
+
+        return list(zip(moves, probabilities.tolist()))
+
+    def get_untried_moves(self, game: Game,
+                          used_moves: Collection[BoardCoord]) -> UntriedMoves:
+        moves = [m for m in game.available_moves if m not in used_moves]
+        return UntriedMoves(
+            moves, self.get_probabilities(self.get_features(game, moves)))
+
+    def fit(self, samples: List[TrainingSample], epochs: int = 100,
+            learning_rate: float = 0.5, regularization: float = 1e-4):
+        """
+        Fit weights by batch gradient descent on cross entropy.
+
+        :param samples: features of available moves and target probabilities
+            (e.g. normalized root visit counts) for each position
+        """
+        if not samples:
+            return
+
+        for _ in range(epochs):
+            gradient = regularization * self.weights
+            for features, targets in samples:
+                probabilities = self.get_probabilities(features)
+                gradient += features.T @ (probabilities - targets) /\
+                    len(samples)
+
+            self.weights -= learning_rate * gradient
+
+# eof
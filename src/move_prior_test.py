@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+import os
+import random
+import shutil
+import tempfile
+import unittest2
+
+import numpy as np
+
+from board import BoardSpec, SparseBoard
+from game import Game
+from game_record import GameRecordReader, GameRecordWriter
+from move_prior import MovePrior, UntriedMoves
+from self_play import self_play
+from train_prior import get_training_samples
+from utc import UTC
+
+__author__ = 'Tomas Novacik'
+
+
+class MovePriorTest(unittest2.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        np.random.seed(1)
+
+    def test_features(self):
+        game = Game(board_spec=BoardSpec(10, 10, 5))
+        game.start()
+        game.move(5, 5)
+
+        features = MovePrior.get_features(game, [(5, 6), (0, 0), (9, 9)])
+
+        self.assertEqual(features.shape, (3, MovePrior.FEATURE_COUNT))
+        # opponent stone is the neighbour of the first move
+        self.assertEqual(features[0, 8:16].sum(), 1)
+        self.assertEqual(features[0, :8].sum(), 0)
+        # corner move has only 9 of 25 neighbourhood fields on board
+        self.assertAlmostEqual(features[1, 18], 9 / 25)
+        self.assertAlmostEqual(features[0, 18], 1)
+
+    def test_priors(self):
+        game = Game(board_spec=BoardSpec(10, 10, 5))
+        game.start()
+        game.move(5, 5)
+
+        priors = dict(MovePrior().get_priors(game))
+
+        self.assertEqual(len(priors), 99)
+        self.assertAlmostEqual(sum(priors.values()), 1)
+        self.assertGreater(priors[(5, 6)], priors[(0, 0)])
+
+    def test_unbounded_priors(self):
+        game = Game(board_spec=BoardSpec(None, None, 5),
+                    board_class=SparseBoard)
+        game.start()
+        game.move(0, 0)
+        game.move(-1, 0)
+
+        priors = MovePrior().get_priors(game)
+
+        self.assertEqual(len(priors), len(game.available_moves))
+
+    def test_untried_moves(self):
+        untried = UntriedMoves([(0, 0), (1, 1), (2, 2)],
+                               np.array([0.2, 0.5, 0.3]))
+
+        self.assertEqual(untried.pop(), ((1, 1), 0.5))
+        self.assertEqual(untried.pop()[0], (2, 2))
+        self.assertAlmostEqual(untried.top_prior, 0.2)
+
+        # pruned move is returned back in prior order
+        untried.push((1, 1))
+        self.assertEqual(len(untried), 2)
+        self.assertEqual(untried.pop()[0], (1, 1))
+        self.assertEqual(untried.pop()[0], (0, 0))
+        self.assertEqual(len(untried), 0)
+
+    def test_fit(self):
+        game = Game(board_spec=BoardSpec(5, 5, 4))
+        game.start()
+        game.move(2, 2)
+
+        moves = list(game.available_moves)
+        features = MovePrior.get_features(game, moves)
+        targets = np.zeros(len(moves))
+        targets[moves.index((0, 0))] = 1
+
+        move_prior = MovePrior()
+        before = move_prior.get_probabilities(features)[moves.index((0, 0))]
+        move_prior.fit([(features, targets)], epochs=50)
+        after = move_prior.get_probabilities(features)[moves.index((0, 0))]
+
+        self.assertGreater(after, before)
+
+    def test_train_from_records(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "games.log")
+
+        try:
+            with GameRecordWriter(path) as writer:
+                for record in self_play(BoardSpec(4, 4, 3),
+                                        UTC(iteration_limit=20), 2):
+                    writer.append(record)
+
+            samples = list(get_training_samples(GameRecordReader(path)))
+            for features, targets in samples:
+                self.assertEqual(len(features), len(targets))
+                self.assertAlmostEqual(targets.sum(), 1)
+
+            MovePrior().fit(samples, epochs=5)
+        finally:
+            shutil.rmtree(directory)
+
+    def _search_open_board(self, utc):
+        game = Game(board_spec=BoardSpec(10, 10, 5))
+        game.start()
+        game.move(5, 5)
+        game.move(4, 4)
+
+        utc.get_move(game)
+        return game, utc.root_node
+
+    def test_puct_expansion_in_prior_order(self):
+        move_prior = MovePrior()
+        game, root_node = self._search_open_board(
+            UTC(iteration_limit=200, prior=move_prior))
+
+        priors = [c.prior for c in root_node.children]
+        top_prior = max(p for _, p in move_prior.get_priors(game))
+
+        self.assertGreater(len(priors), 1)
+        self.assertEqual(priors, sorted(priors, reverse=True))
+        self.assertAlmostEqual(priors[0], top_prior)
+
+    def test_puct_prefers_high_prior_moves(self):
+        def get_edge_visits(root_node):
+            return sum(c.n for c in root_node.children
+                       if c.move[0] in (0, 9) or c.move[1] in (0, 9))
+
+        _, root_node = self._search_open_board(
+            UTC(iteration_limit=500, prior=MovePrior()))
+        top_children = sorted(root_node.children, key=lambda c: c.prior)[-10:]
+
+        random.seed(1)
+        _, ucb_root_node = self._search_open_board(UTC(iteration_limit=500))
+
+        self.assertGreater(sum(c.n for c in top_children),
+                           get_edge_visits(root_node))
+        self.assertLess(get_edge_visits(root_node),
+                        get_edge_visits(ucb_root_node))
+
+# eof
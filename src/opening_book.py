@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+
+__author__ = 'Tomas Novacik'
+
+import argparse
+import collections
+import hashlib
+import logging
+import mmap
+import os
+import struct
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from board import BoardCoord, BoardSpec
+from game import Game
+from utc import UTC
+
+# (transpose, flip x, flip y), transposition is valid for square boards only
+Symmetry = Tuple[bool, bool, bool]
+
+BookEntry = NamedTuple("BookEntry",
+                       [("move", BoardCoord), ("visits", int),
+                        ("total_visits", int), ("value", float)])
+
+
+class OpeningBookException(Exception):
+    pass
+
+
+def get_symmetries(board_spec: BoardSpec):
+    transpositions = [False, True] if board_spec.width == board_spec.height\
+        else [False]
+
+    return [(transpose, flip_x, flip_y)
+            for transpose in transpositions
+            for flip_x in [False, True]
+            for flip_y in [False, True]]
+
+
+def transform(coord: BoardCoord, symmetry: Symmetry,
+              board_spec: BoardSpec) -> BoardCoord:
+    transpose, flip_x, flip_y = symmetry
+    x, y = coord
+    if flip_x:
+        x = board_spec.width - 1 - x
+    if flip_y:
+        y = board_spec.height - 1 - y
+    if transpose:
+        x, y = y, x
+
+    return x, y
+
+
+def inverse_transform(coord: BoardCoord, symmetry: Symmetry,
+                      board_spec: BoardSpec) -> BoardCoord:
+    transpose, flip_x, flip_y = symmetry
+    x, y = coord
+    if transpose:
+        x, y = y, x
+
+    return transform((x, y), (False, flip_x, flip_y), board_spec)
+
+
+def get_canonical_key(game: Game) -> Tuple[int, Symmetry]:
+    """
+    Hash of the position that is the same for all symmetric positions.
+
+    Returns the hash together with the symmetry that maps the position to its
+    canonical form.
+    """
+    board = game.board
+    if board.width is None or board.height is None:
+        raise OpeningBookException("Opening book requires bounded board.")
+
+    board_spec = BoardSpec(board.width, board.height, board.winning_move_count)
+    stones = board.stones
+
+    canonical = None
+    for symmetry in get_symmetries(board_spec):
+        position = sorted(transform(coord, symmetry, board_spec) + (value,)
+                          for coord, value in stones.items())
+        if canonical is None or position < canonical[0]:
+            canonical = position, symmetry
+
+    position, symmetry = canonical
+    data = "{};{}".format(game.player_move.value, position).encode()
+    key = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(),
+                         "little")
+
+    return key, symmetry
+
+
+class OpeningBook:
+    """
+    Read only memory mapped opening book.
+
+    File consists of a header followed by fixed size records sorted by
+    canonical position key, lookup is a binary search over the mapped file.
+    """
+
+    MAGIC = b"TTTB"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHHHI")
+    RECORD = struct.Struct("<QhhIIf")
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+
+        # empty file can not be mapped
+        if os.fstat(self._file.fileno()).st_size < self.HEADER.size:
+            self._file.close()
+            raise OpeningBookException("Invalid opening book: {}".format(path))
+
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, width, height, winning_count, self._count =\
+            self.HEADER.unpack_from(self._mmap)
+
+        if magic != self.MAGIC or version != self.VERSION or\
+                len(self._mmap) < self.HEADER.size +\
+                self._count * self.RECORD.size:
+            self.close()
+            raise OpeningBookException("Invalid opening book: {}".format(path))
+
+        self.board_spec = BoardSpec(width, height, winning_count)
+
+    def __len__(self):
+        return self._count
+
+    def _get_record(self, index: int):
+        return self.RECORD.unpack_from(
+            self._mmap, self.HEADER.size + index * self.RECORD.size)
+
+    def _get_key(self, index: int) -> int:
+        return self._get_record(index)[0]
+
+    def _find(self, key: int) -> Optional[BookEntry]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self._count:
+            return None
+
+        record_key, x, y, visits, total_visits, value = self._get_record(low)
+        if record_key != key:
+            return None
+
+        return BookEntry((x, y), visits, total_visits, value)
+
+    def get_entry(self, game: Game) -> Optional[BookEntry]:
+        board = game.board
+        if (board.width, board.height, board.winning_move_count) !=\
+                tuple(self.board_spec):
+            return None
+
+        key, symmetry = get_canonical_key(game)
+        entry = self._find(key)
+        if entry is None:
+            return None
+
+        move = inverse_transform(entry.move, symmetry, self.board_spec)
+        return entry._replace(move=move)
+
+    def get_move(self, game: Game) -> Optional[BoardCoord]:
+        entry = self.get_entry(game)
+        return None if entry is None else entry.move
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    @classmethod
+    def write(cls, path: str, board_spec: BoardSpec,
+              entries: Dict[int, BookEntry]):
+        """Write entries keyed by canonical position key"""
+        with open(path, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, board_spec.width,
+                                    board_spec.height,
+                                    board_spec.winning_count, len(entries)))
+            for key in sorted(entries):
+                entry = entries[key]
+                f.write(cls.RECORD.pack(key, entry.move[0], entry.move[1],
+                                        entry.visits, entry.total_visits,
+                                        entry.value))
+
+
+def build_opening_book(board_spec: BoardSpec, plies: int, utc: UTC,
+                       branching: int = 3) -> Dict[int, BookEntry]:
+    """
+    Search positions of the first plies of the game.
+
+    Starting from the empty board every position is searched and for each of
+    its `branching` most visited moves the following position is searched as
+    well until the ply limit is reached. Entries are stored in canonical
+    coordinates.
+    """
+    entries = {}
+
+    game = Game(board_spec=board_spec)
+    game.start()
+
+    queue = collections.deque([(game, 0)])
+
+    while queue:
+        game, ply = queue.popleft()
+
+        key, symmetry = get_canonical_key(game)
+        if key in entries:
+            continue
+
+        move = utc.get_move(game)
+        root_node = utc.root_node
+
+        children = sorted(root_node.children, key=lambda n: n.n, reverse=True)
+        best_node = next((c for c in children if c.move == move), None)
+
+        if best_node is None or best_node.n == 0:
+            visits, value = 0, 0.0
+        else:
+            visits, value = best_node.n, best_node.w / best_node.n
+
+        entries[key] = BookEntry(transform(move, symmetry, board_spec),
+                                 visits, root_node.n, value)
+        logging.info("Ply {}: {} positions in book".format(ply, len(entries)))
+
+        if ply + 1 >= plies:
+            continue
+
+        next_moves = [c.move for c in children[:branching]]
+        if move not in next_moves:
+            next_moves.append(move)
+
+        for next_move in next_moves:
+            new_game = game.clone()
+            new_game.move(*next_move)
+            if not new_game.is_finished:
+                queue.append((new_game, ply + 1))
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build opening book by offline search.")
+
+    parser.add_argument("output", help="Opening book file")
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--winning-count", type=int, default=5)
+    parser.add_argument("--plies", type=int, default=2,
+                        help="Number of plies covered by the book")
+    parser.add_argument("--branching", type=int, default=3,
+                        help="Number of followed moves in each position")
+    parser.add_argument("--time-limit", type=float, default=60,
+                        help="Search time limit per position")
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+
+    board_spec = BoardSpec(args.width, args.height, args.winning_count)
+    entries = build_opening_book(board_spec, args.plies,
+                                 UTC(args.time_limit), args.branching)
+    OpeningBook.write(args.output, board_spec, entries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+import os
+import random
+import tempfile
+import unittest2
+
+from board import BoardSpec
+from game import Game
+from opening_book import OpeningBook, OpeningBookException, BookEntry, build_opening_book,\
+    get_canonical_key, get_symmetries, transform, inverse_transform
+from utc import UTC
+
+__author__ = 'Tomas Novacik'
+
+
+class OpeningBookTest(unittest2.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.board_spec = BoardSpec(3, 3, 3)
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def _get_game(self, moves):
+        game = Game(board_spec=self.board_spec)
+        game.start()
+        for move in moves:
+            game.move(*move)
+        return game
+
+    def test_inverse_transform(self):
+        board_spec = BoardSpec(4, 4, 3)
+        for symmetry in get_symmetries(board_spec):
+            coord = transform((1, 3), symmetry, board_spec)
+            self.assertEqual(inverse_transform(coord, symmetry, board_spec),
+                             (1, 3))
+
+    def test_canonical_key_symmetric_positions(self):
+        key, _ = get_canonical_key(self._get_game([(0, 0), (1, 0)]))
+        mirrored_key, _ = get_canonical_key(self._get_game([(2, 2), (2, 1)]))
+        other_key, _ = get_canonical_key(self._get_game([(0, 0), (2, 2)]))
+
+        self.assertEqual(key, mirrored_key)
+        self.assertNotEqual(key, other_key)
+
+    def test_write_and_lookup(self):
+        game = self._get_game([(0, 0)])
+        key, symmetry = get_canonical_key(game)
+        canonical_move = transform((0, 1), symmetry, self.board_spec)
+
+        OpeningBook.write(self.path, self.board_spec,
+                          {key: BookEntry(canonical_move, 10, 20, 0.5)})
+
+        book = OpeningBook(self.path)
+        self.assertEqual(len(book), 1)
+        self.assertEqual(book.get_move(game), (0, 1))
+        # the same position mirrored
+        self.assertEqual(book.get_move(self._get_game([(0, 2)])), (0, 1))
+        self.assertIsNone(book.get_move(self._get_game([(1, 1)])))
+        book.close()
+
+    def test_invalid_book(self):
+        # empty file
+        with self.assertRaises(OpeningBookException):
+            OpeningBook(self.path)
+
+        with open(self.path, "wb") as f:
+            f.write(b"XXXX" + bytes(OpeningBook.HEADER.size))
+
+        with self.assertRaises(OpeningBookException):
+            OpeningBook(self.path)
+
+        # header promising more records than stored
+        OpeningBook.write(self.path, self.board_spec, {})
+        with open(self.path, "r+b") as f:
+            f.write(OpeningBook.HEADER.pack(OpeningBook.MAGIC,
+                                            OpeningBook.VERSION, 3, 3, 3, 1))
+
+        with self.assertRaises(OpeningBookException):
+            OpeningBook(self.path)
+
+    def test_utc_uses_book(self):
+        entries = build_opening_book(self.board_spec, 2,
+                                     UTC(iteration_limit=50))
+        OpeningBook.write(self.path, self.board_spec, entries)
+
+        book = OpeningBook(self.path)
+        game = self._get_game([])
+        book_move = book.get_move(game)
+
+        # zero iterations would fail without a book hit
+        utc = UTC(iteration_limit=0, opening_book=book)
+        self.assertEqual(utc.get_move(game), book_move)
+        book.close()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+# eof
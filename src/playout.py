@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+__author__ = 'Tomas Novacik'
+
+import argparse
+import random
+import time
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from board import Board, BoardCoord, BoardSpec, PlayerType
+from game import Game
+
+PlayedMoves = List[Tuple[BoardCoord, PlayerType]]
+
+PlayoutResult = NamedTuple("PlayoutResult",
+                           [("is_finished", bool),
+                            ("winning_player", Optional[PlayerType]),
+                            ("moves", PlayedMoves)])
+
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def _count_direction(stones: Dict[BoardCoord, str], coord: BoardCoord,
+                     value: str, dx: int, dy: int, limit: int) -> int:
+    count = 0
+    x, y = coord[0] + dx, coord[1] + dy
+    while count < limit and stones.get((x, y)) == value:
+        count += 1
+        x, y = x + dx, y + dy
+
+    return count
+
+
+def _is_winning(stones: Dict[BoardCoord, str], coord: BoardCoord, value: str,
+                winning_count: int) -> bool:
+    for dx, dy in DIRECTIONS:
+        count = 1 +\
+            _count_direction(stones, coord, value, dx, dy, winning_count) +\
+            _count_direction(stones, coord, value, -dx, -dy, winning_count)
+        if count >= winning_count:
+            return True
+
+    return False
+
+
+def fast_playout(game: Game, max_depth: int) -> PlayoutResult:
+    """
+    Random playout that shuffles the free fields only once.
+
+    Shuffled fields are assigned to the players alternately and the winner
+    is the player completing a winning line first, the win check is skipped
+    until the player has enough stones. The outcome has the same
+    distribution as playing random moves with Game.move. Requires board
+    with all the free fields available (Board, not SparseBoard).
+    """
+    if game.is_finished:
+        return PlayoutResult(True, game.winning_player, [])
+
+    board = game.board
+    assert isinstance(board, Board), "Fast playout requires dense board"
+
+    free_fields = list(board.available_moves)
+    random.shuffle(free_fields)
+    fields = free_fields[:max_depth]
+
+    stones = dict(board.stones)
+    players = [game.player_move,
+               PlayerType.CROSS if game.player_move == PlayerType.CIRCLE
+               else PlayerType.CIRCLE]
+    stone_counts = [sum(1 for v in stones.values() if v == p.value)
+                    for p in players]
+
+    winning_count = board.winning_move_count
+    moves = []
+
+    for i, coord in enumerate(fields):
+        player = players[i % 2]
+        stones[coord] = player.value
+        stone_counts[i % 2] += 1
+        moves.append((coord, player))
+
+        if stone_counts[i % 2] >= winning_count and\
+                _is_winning(stones, coord, player.value, winning_count):
+            return PlayoutResult(True, player, moves)
+
+    # draw when the board is full, unfinished when max depth was reached
+    return PlayoutResult(len(fields) == len(free_fields), None, moves)
+
+
+def benchmark(board_spec: BoardSpec, duration: float, max_depth: int)\
+        -> Tuple[float, float]:
+    """Playouts per second of game based and fast playout from empty board"""
+    # imported here, utc depends on this module
+    from utc import UTC
+
+    game = Game(board_spec=board_spec)
+    game.start()
+
+    utc = UTC(max_depth=max_depth)
+    results = []
+
+    for playout in [utc._playout, lambda g: fast_playout(g, max_depth)]:
+        count = 0
+        start_time = time.time()
+        while time.time() - start_time < duration:
+            playout(game)
+            count += 1
+        results.append(count / (time.time() - start_time))
+
+    return results[0], results[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Playout benchmark.")
+
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--winning-count", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=3,
+                        help="Seconds per playout type")
+
+    args = parser.parse_args()
+
+    board_spec = BoardSpec(args.width, args.height, args.winning_count)
+    game_rate, fast_rate = benchmark(board_spec, args.duration,
+                                     args.width * args.height)
+
+    print("Game playouts/sec: {:.0f}".format(game_rate))
+    print("Fast playouts/sec: {:.0f}".format(fast_rate))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import collections
+import random
+import unittest2
+
+from board import BoardSpec
+from game import Game
+from playout import fast_playout
+from utc import UTC
+
+__author__ = 'Tomas Novacik'
+
+
+class PlayoutTest(unittest2.TestCase):
+
+    PLAYOUT_COUNT = 4000
+
+    def setUp(self):
+        random.seed(1)
+
+    def _get_game(self, board_spec, moves):
+        game = Game(board_spec=board_spec)
+        game.start()
+        for move in moves:
+            game.move(*move)
+        return game
+
+    def _get_outcomes(self, playout, game):
+        outcomes = collections.Counter()
+        for _ in range(self.PLAYOUT_COUNT):
+            result = playout(game)
+            outcomes[(result.winning_player, result.is_finished)] += 1
+        return outcomes
+
+    def test_same_result_as_game(self):
+        game = self._get_game(BoardSpec(6, 6, 4), [(2, 2), (3, 3)])
+
+        for _ in range(200):
+            result = fast_playout(game, 100)
+
+            new_game = game.clone()
+            for (x, y), player in result.moves:
+                self.assertEqual(new_game.player_move, player)
+                new_game.move(x, y)
+
+            self.assertEqual(new_game.is_finished, result.is_finished)
+            self.assertEqual(new_game.winning_player, result.winning_player)
+
+    def test_max_depth(self):
+        game = self._get_game(BoardSpec(10, 10, 5), [])
+
+        result = fast_playout(game, 4)
+
+        self.assertEqual(len(result.moves), 4)
+        self.assertFalse(result.is_finished)
+
+    def test_statistical_equivalence(self):
+        """Chi-squared test of outcome frequencies of both playouts"""
+        for board_spec, moves, max_depth in [
+                (BoardSpec(3, 3, 3), [(1, 1)], 100),
+                (BoardSpec(5, 5, 4), [(2, 2), (1, 1)], 100),
+                (BoardSpec(5, 5, 4), [], 10)]:
+            game = self._get_game(board_spec, moves)
+
+            expected = self._get_outcomes(UTC(max_depth=max_depth)._playout,
+                                          game)
+            observed = self._get_outcomes(
+                lambda g: fast_playout(g, max_depth), game)
+
+            self.assertEqual(set(observed), set(expected))
+
+            chi_squared = sum((observed[k] - expected[k]) ** 2 /
+                              (observed[k] + expected[k])
+                              for k in expected)
+            # at most 3 outcomes, 99.9% quantile of chi-squared with 2 dof
+            self.assertLess(chi_squared, 13.82)
+
+# eof
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+__author__ = 'Tomas Novacik'
+
+import argparse
+import itertools
+import logging
+import multiprocessing
+
+from typing import Iterator, Optional, Type
+
+from board import Board, BoardSpec, SparseBoard
+from game import Game
+from game_record import GameRecord, GameRecordWriter
+from utc import UTC
+
+
+def self_play(board_spec: BoardSpec, utc: UTC,
+              games: Optional[int] = None,
+              board_class: Type = Board,
+              max_moves: Optional[int] = None) -> Iterator[GameRecord]:
+    """
+    Let the bot play against itself and yield the finished games.
+
+    :param games: number of games, endless stream if None
+    :param max_moves: game is stopped as a draw after this number of moves
+    """
+    for _ in itertools.count() if games is None else range(games):
+        game = Game(board_spec=board_spec, board_class=board_class)
+        game.start()
+
+        visits = []
+        while not game.is_finished:
+            if max_moves is not None and len(game.moves) >= max_moves:
+                break
+
+            move = utc.get_move(game)
+
+            root_node = utc.root_node
+            if root_node is None: # opening book hit
+                visits.append([])
+            else:
+                visits.append([(n.move, n.n) for n in root_node.children])
+
+            game.move(*move)
+
+        yield GameRecord(board_spec, game.moves, visits, game.winning_player)
+
+
+def _run_worker(path: str, board_spec: BoardSpec, games: int,
+                time_limit: float, sparse: bool):
+    board_class = SparseBoard if sparse else Board
+
+    with GameRecordWriter(path) as writer:
+        for record in self_play(board_spec, UTC(time_limit), games,
+                                board_class):
+            writer.append(record)
+            logging.info("Game with {} moves written."
+                         .format(len(record.moves)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record self-play games to append only log.")
+
+    parser.add_argument("output", help="Game record log file")
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--winning-count", type=int, default=5)
+    parser.add_argument("--sparse", help="Use sparse board representation",
+                        action="store_true", default=False)
+    parser.add_argument("--games", type=int, default=10,
+                        help="Number of games per worker")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--time-limit", type=float, default=1,
+                        help="Search time limit per move")
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+
+    board_spec = BoardSpec(args.width, args.height, args.winning_count)
+    workers = [multiprocessing.Process(
+                    target=_run_worker,
+                    args=(args.output, board_spec, args.games,
+                          args.time_limit, args.sparse))
+               for _ in range(args.workers)]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+__author__ = 'Tomas Novacik'
+
+import argparse
+import logging
+
+import numpy as np
+
+from typing import Iterator
+
+from board import Board, SparseBoard
+from game import Game
+from game_record import GameRecordReader
+from move_prior import MovePrior, TrainingSample
+
+
+def get_training_samples(reader: GameRecordReader)\
+        -> Iterator[TrainingSample]:
+    """
+    Replay recorded games, target of each position are normalized root visit
+    counts or the played move if the visits are missing.
+    """
+    for record in reader:
+        board_spec = record.board_spec
+        board_class = SparseBoard if board_spec.width is None or\
+            board_spec.height is None else Board
+
+        game = Game(board_spec=board_spec, board_class=board_class)
+        game.start()
+
+        for move, visits in zip(record.moves, record.visits):
+            moves = list(game.available_moves)
+            index = {m: i for i, m in enumerate(moves)}
+            targets = np.zeros(len(moves))
+
+            for visit_move, n in visits:
+                if visit_move in index:
+                    targets[index[visit_move]] = n
+
+            if targets.sum() == 0 and move in index:
+                targets[index[move]] = 1
+
+            if targets.sum() > 0:
+                yield (MovePrior.get_features(game, moves),
+                       targets / targets.sum())
+
+            game.move(*move)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train move prior from self-play game records.")
+
+    parser.add_argument("records", help="Game record log file")
+    parser.add_argument("output", help="Output weights file (.npy)")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+
+    samples = list(get_training_samples(GameRecordReader(args.records)))
+    logging.info("Training on {} positions.".format(len(samples)))
+
+    move_prior = MovePrior()
+    move_prior.fit(samples, args.epochs, args.learning_rate)
+    move_prior.save(args.output)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 import time
 import math
+import sys
 
 from board import Move
 
@@ -9,9 +10,16 @@ __author__ = 'Tomas Novacik'
 import random
 import logging
 
-from typing import List, Optional
+from typing import List, Optional, TYPE_CHECKING
 from game import PlayerType, Game
-from board import BoardCoord
+from board import Board, BoardCoord
+from playout import fast_playout, PlayedMoves
+
+if TYPE_CHECKING:
+    # imported for type hints only, opening_book depends on this module and
+    # move_prior requires NumPy
+    from move_prior import MovePrior
+    from opening_book import OpeningBook
 
 UTCNodes = List["UTCNode"]
 Moves = List[Move]
@@ -28,6 +36,9 @@ class SearchFinished(Exception):
 
 class UTCNode:
 
+    __slots__ = ("move", "children", "player", "n", "w", "amaf", "move_count",
+                 "prior", "untried", "_is_expandable")
+
     def __init__(self, move: Optional[BoardCoord], children: UTCNodes,
                  player: PlayerType):
         self.move = move
@@ -35,8 +46,23 @@ class UTCNode:
         self.player = player
         self.n = 0
         self.w = 0
+        # RAVE mode only - all-moves-as-first [n, w] statistics of all moves
+        # playable from this node (expanded or not) keyed by move and number
+        # of moves playable from this node, set on the first expansion
+        self.amaf = None
+        self.move_count = None
+        # PUCT mode only - prior of the move and not expanded moves sorted by
+        # prior (UntriedMoves), computed on the first expansion
+        self.prior = 0.0
+        self.untried = None
         self._is_expandable = True
 
+    def reset(self, move: Optional[BoardCoord], player: PlayerType):
+        """Reinitialize recycled node"""
+        children = self.children
+        children.clear()
+        self.__init__(move, children, player)
+
     def add_child(self, child) -> None:
         self.children.append(child)
 
@@ -49,36 +75,242 @@ class UTCNode:
         self._is_expandable = value
 
 
+class UTCNodePool:
+    """Allocator of UTC nodes recycling nodes of released subtrees"""
+
+    # move coordinates and [n, w] list of AMAF stats with float w
+    AMAF_ENTRY_MEMORY = sys.getsizeof((0, 0)) + sys.getsizeof([0, 0.0]) +\
+        sys.getsizeof(0.0)
+
+    def __init__(self):
+        self._free_nodes = []
+        # number of nodes in use
+        self.size = 0
+        # bytes of untried moves (PUCT mode) of nodes in use
+        self.untried_memory = 0
+        # bytes of AMAF stats (RAVE mode) of nodes in use
+        self.amaf_memory = 0
+
+        # node, its children list, float stats and the slot in the parent's
+        # children list
+        node = UTCNode(None, [], PlayerType.CROSS)
+        self._node_memory = sys.getsizeof(node) +\
+            sys.getsizeof(node.children) + 2 * sys.getsizeof(0.0) + 8
+
+    @property
+    def memory(self) -> int:
+        """
+        Estimated memory of nodes in use in bytes - nodes with their
+        attributes and children lists, untried moves (PUCT mode) and AMAF
+        stats (RAVE mode). Game states and playouts are not included.
+        """
+        return self.size * self._node_memory + self.untried_memory +\
+            self.amaf_memory
+
+    def acquire(self, move: Optional[BoardCoord],
+                player: PlayerType) -> UTCNode:
+        self.size += 1
+        if self._free_nodes:
+            node = self._free_nodes.pop()
+            node.reset(move, player)
+            return node
+        return UTCNode(move, [], player)
+
+    def release(self, node: UTCNode) -> int:
+        """Release whole subtree of the node, returns number of nodes"""
+        count = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            node.children.clear()
+            if node.untried is not None:
+                self.untried_memory -= node.untried.memory
+                node.untried = None
+            if node.amaf is not None:
+                self.amaf_memory -= sys.getsizeof(node.amaf) +\
+                    len(node.amaf) * self.AMAF_ENTRY_MEMORY
+                node.amaf = None
+            self._free_nodes.append(node)
+            count += 1
+
+        self.size -= count
+        return count
+
+
+class SearchStats:
+    """Statistics of the last search"""
+
+    def __init__(self):
+        self.iterations = 0
+        self.peak_nodes = 0
+        self.pruned_nodes = 0
+        # estimate of the search tree memory in bytes, see UTCNodePool.memory
+        self.peak_memory = 0
+
+    def __str__(self):
+        return "SearchStats(iterations = {}, peak_nodes = {}, " \
+               "pruned_nodes = {}, peak_memory = {})"\
+            .format(self.iterations, self.peak_nodes, self.pruned_nodes,
+                    self.peak_memory)
+
+
 class UTC:
 
     DEFAULT_C = 1.4
     DEFAULT_PLAYOUT_MAX_DEPTH = 100 # maximum search limit
     DEFAULT_TIME_LIMIT = 10 # secs
+    DEFAULT_RAVE_EQUIVALENCE = 500 # visits where UCT and AMAF weigh the same
+    DEFAULT_RAVE_FPU = 0.5 # value of not expanded moves without AMAF stats
+    DEFAULT_C_PUCT = 1.5
+    DEFAULT_PRUNE_RATIO = 0.25 # part of the node budget freed by pruning
 
     def __init__(self, time_limit: float = DEFAULT_TIME_LIMIT,
                  max_depth: int = DEFAULT_PLAYOUT_MAX_DEPTH,
-                 iteration_limit: Optional[int] = None):
+                 iteration_limit: Optional[int] = None,
+                 rave: bool = False,
+                 rave_equivalence: int = DEFAULT_RAVE_EQUIVALENCE,
+                 opening_book: Optional["OpeningBook"] = None,
+                 prior: Optional["MovePrior"] = None,
+                 c_puct: float = DEFAULT_C_PUCT,
+                 fast_playout: bool = False,
+                 max_nodes: Optional[int] = None,
+                 max_memory: Optional[int] = None):
         """
         In case iteration limit is specified time_limit is ignored.
 
+        RAVE (rapid action value estimation) mode collects all-moves-as-first
+        statistics from every playout and blends them with the UCT value,
+        the weight of AMAF part decays with the number of node visits.
+
         :param time_limit: search timi limit in seconds
         :type time_limit: int
         :param max_depth: maximum depth of playout
         :type max_depth: int
         :param iteration_limit: maximum iteration limit - overrides time limit
         :type iteration_limit: int
+        :param rave: enable RAVE/AMAF statistics
+        :type rave: bool
+        :param rave_equivalence: number of visits where UCT and AMAF values
+            have the same weight
+        :type rave_equivalence: int
+        :param opening_book: book consulted before the search is started
+        :type opening_book: OpeningBook
+        :param prior: move prior, enables PUCT selection and expansion of
+            moves in prior order
+        :type prior: MovePrior
+        :param c_puct: PUCT exploration constant
+        :type c_puct: float
+        :param fast_playout: use shuffle once playouts (dense board only)
+        :type fast_playout: bool
+        :param max_nodes: node budget of the search tree (at least 2), least
+            visited subtrees are pruned when it is reached, when nothing can
+            be pruned the search only deepens existing nodes
+        :type max_nodes: int
+        :param max_memory: memory budget of the search tree in bytes
+            (estimated, see UTCNodePool.memory), handled as the node budget
+        :type max_memory: int
         """
         self._time_limit = time_limit
         self._max_depth = max_depth
         self._iteration_limit = iteration_limit
-
-        # for inspection during tests only
+        self._rave = rave
+        self._rave_equivalence = rave_equivalence
+        self._opening_book = opening_book
+        self._prior = prior
+        self._c_puct = c_puct
+        self._fast_playout = fast_playout
+        if max_nodes is not None and max_nodes < 2:
+            raise ValueError("Node budget has to allow at least root node "
+                             "with one child, got: {}".format(max_nodes))
+        self._max_nodes = max_nodes
+        self._max_memory = max_memory
+        self._pool = UTCNodePool()
+
+        # last search tree, for inspection (tests, opening book builder)
         self.root_node = None
+        self.stats = SearchStats()
 
     def _get_move_history(self, nodes: UTCNodes) -> List[BoardCoord]:
         return [n.move for n in nodes]
 
-    def _selection(self, root_node: UTCNode) -> UTCNodes:
+    def _get_value(self, node: UTCNode, parent: UTCNode) -> float:
+        value = node.w / node.n
+
+        if not self._rave or parent.amaf is None or\
+                node.move not in parent.amaf:
+            return value
+
+        amaf_n, amaf_w = parent.amaf[node.move]
+        beta = math.sqrt(self._rave_equivalence /
+                         (3 * node.n + self._rave_equivalence))
+
+        return (1 - beta) * value + beta * amaf_w / amaf_n
+
+    def _get_score(self, node: UTCNode, parent: UTCNode, total_n: int):
+        if self._prior is None:
+            return self._get_value(node, parent) +\
+                   math.sqrt(math.log(total_n) / node.n) * self.DEFAULT_C
+
+        return self._get_value(node, parent) + self._c_puct * node.prior *\
+            math.sqrt(parent.n) / (1 + node.n)
+
+    def _get_untried_amaf_values(self, node: UTCNode, moves=None):
+        """
+        AMAF values of not expanded moves, moves without stats are valued
+        by first play urgency. Moves of the node are either given or only
+        those with AMAF stats are returned together with the number of moves
+        without stats.
+        """
+        used_moves = set(c.move for c in node.children)
+        amaf = node.amaf or {}
+
+        if moves is None:
+            values = {m: w / n for m, (n, w) in amaf.items()
+                      if m not in used_moves}
+            unseen_count = node.move_count - len(used_moves) - len(values)
+            return values, unseen_count
+
+        values = {}
+        for m in moves:
+            if m in used_moves:
+                continue
+            stats = amaf.get(m)
+            values[m] = self.DEFAULT_RAVE_FPU if stats is None\
+                else stats[1] / stats[0]
+        return values, 0
+
+    def _is_expansion_preferred(self, node: UTCNode, top_score: float,
+                                total_n: int):
+        """
+        Compare best child with the best not expanded move (without any
+        visits) - move of the highest prior in PUCT mode, move of the
+        highest AMAF value in RAVE mode.
+        """
+        if not node.is_expandable:
+            return False
+        if not node.children:
+            return True
+
+        if self._prior is not None:
+            return self._c_puct * node.untried.top_prior * math.sqrt(node.n) >=\
+                top_score
+
+        values, unseen_count = self._get_untried_amaf_values(node)
+        if unseen_count > 0:
+            values[None] = self.DEFAULT_RAVE_FPU
+
+        # not expanded move is scored as the child with a single visit
+        return max(values.values()) +\
+            math.sqrt(math.log(total_n)) * self.DEFAULT_C >= top_score
+
+    def _selection(self, root_node: UTCNode,
+                   is_expansion_allowed: bool = True) -> UTCNodes:
+        """
+        Select path to the node to be expanded. When expansion is not
+        allowed, nodes are treated as fully expanded and the path ends in
+        a leaf.
+        """
         logging.debug("Selecting new node to expand.")
         total_n = root_node.n
 
@@ -91,7 +323,11 @@ class UTC:
         previous_node = None
 
         while True:
-            if actual_node.is_expandable:
+            if not is_expansion_allowed:
+                if not actual_node.children:
+                    break
+            elif actual_node.is_expandable and self._prior is None and\
+                    not self._rave:
                 break
 
             # local minimum encountered - end the search
@@ -100,22 +336,43 @@ class UTC:
 
             previous_node = actual_node
 
-            top_ucb1 = -math.inf
+            top_score = -math.inf
             for n in actual_node.children:
-                # TODO w/n could be computed in backprop phase
-                ucb1 = n.w / n.n + math.sqrt(math.log(total_n) / n.n) * self.DEFAULT_C
-                if ucb1 > top_ucb1:
-                    top_ucb1 = ucb1
+                score = self._get_score(n, actual_node, total_n)
+                if score > top_score:
+                    top_score = score
                     top_node = n
 
+            if is_expansion_allowed and\
+                    (self._prior is not None or self._rave) and\
+                    self._is_expansion_preferred(actual_node, top_score,
+                                                 total_n):
+                break
+
             top_nodes.append(top_node)
 
             actual_node = top_node
 
         return top_nodes
 
-    def _playout(self, game: Game):
+    def _playout(self, game: Game,
+                 played_moves: Optional[PlayedMoves] = None):
+        """
+        Play random game till the end or max depth.
+
+        Returns the finished game or PlayoutResult for fast playouts, both
+        provide winning_player.
+
+        :param played_moves: if specified, moves played during playout are
+            appended together with player that played them
+        """
         logging.debug("Starting playout game.")
+        if self._fast_playout and isinstance(game.board, Board):
+            result = fast_playout(game, self._max_depth)
+            if played_moves is not None:
+                played_moves.extend(result.moves)
+            return result
+
         moves_played = 0
 
         new_game = game.clone()
@@ -124,6 +381,8 @@ class UTC:
             if new_game.is_finished:
                 break
             x, y = random.choice(new_game.board.available_moves)
+            if played_moves is not None:
+                played_moves.append(((x, y), new_game.player_move))
             new_game.move(x, y)
 
             moves_played += 1
@@ -136,13 +395,38 @@ class UTC:
         assert game.available_moves, "There should be always avail. moves"
         assert not game.is_finished, "Game should not be finished"
 
-        used_moves = set([c.move for c in node.children])
+        if node.move_count is None:
+            node.move_count = len(game.available_moves)
+
+        if self._prior is None and self._rave:
+            # most promising move according to AMAF stats
+            values, _ = self._get_untried_amaf_values(node,
+                                                      game.available_moves)
+            top_value = max(values.values())
+
+            new_move = random.choice(
+                [m for m, v in values.items() if v == top_value])
+            prior = 0.0
+            is_last_move = len(values) == 1
+        elif self._prior is None:
+            used_moves = set([c.move for c in node.children])
+
+            aval_moves = set(game.available_moves) - used_moves
 
-        aval_moves = set(game.available_moves) - used_moves
+            new_move = random.choice(list(aval_moves))
+            prior = 0.0
+            is_last_move = len(aval_moves) == 1
+        else:
+            if node.untried is None:
+                used_moves = set([c.move for c in node.children])
+                node.untried = self._prior.get_untried_moves(game, used_moves)
+                self._pool.untried_memory += node.untried.memory
 
-        new_move = random.choice(list(aval_moves))
+            new_move, prior = node.untried.pop()
+            is_last_move = not node.untried
 
-        new_node = UTCNode(new_move, [], game.player_move)
+        new_node = self._pool.acquire(new_move, game.player_move)
+        new_node.prior = prior
 
         game.move(*new_move)
         node.add_child(new_node)
@@ -150,11 +434,48 @@ class UTC:
         if game.is_finished:
             new_node.is_expandable = False
 
-        if len(aval_moves) == 1:
+        if is_last_move:
             node.is_expandable = False
 
         return new_node
 
+    def _prune(self, root_node: UTCNode):
+        """
+        Release least visited subtrees until the node budget is freed by
+        the prune ratio. Root children are kept.
+        """
+        candidates = []
+        stack = list(root_node.children)
+        while stack:
+            parent = stack.pop()
+            for child in parent.children:
+                candidates.append((child.n, parent, child))
+                stack.append(child)
+
+        candidates.sort(key=lambda c: c[0])
+
+        for _, parent, child in candidates:
+            if not self._is_over_budget(1 - self.DEFAULT_PRUNE_RATIO):
+                break
+            # subtree already released together with its ancestor
+            if child not in parent.children:
+                continue
+
+            parent.children.remove(child)
+            parent.is_expandable = True
+            if parent.untried is not None:
+                parent.untried.push(child.move)
+
+            self.stats.pruned_nodes += self._pool.release(child)
+
+    def _is_over_budget(self, scale: float = 1.0) -> bool:
+        """Check node and memory budgets scaled by the given ratio"""
+        if self._max_nodes is not None and\
+                self._pool.size >= self._max_nodes * scale:
+            return True
+        return self._max_memory is not None and\
+            self._pool.memory >= self._max_memory * scale
+
     def _is_simulation_end(self, start_time: float, iter_count: int):
         """
         End simulation of time/iter limit was reached depending on initial setup
@@ -168,27 +489,52 @@ class UTC:
         start_time = time.time()
 
         while not self._is_simulation_end(start_time, iter_count):
-            nodes = self._selection(root_node)
+            if self._is_over_budget():
+                self._prune(root_node)
+
+            # budget exhausted - only deepen the existing nodes, root is
+            # always expanded at least once
+            is_expansion_allowed = not root_node.children or\
+                not self._is_over_budget()
+
+            nodes = self._selection(root_node, is_expansion_allowed)
             actual_game = game.clone() # TODO to much cloning
             for m in self._get_move_history(nodes[1:]):
                 actual_game.move(*m)
 
-            new_node = self._expand(nodes[-1], actual_game)
+            if is_expansion_allowed:
+                new_node = self._expand(nodes[-1], actual_game)
+
+                # check if it is forced win
+                if (len(nodes) == 1 and
+                    actual_game.is_finished and
+                    game.player_move == actual_game.winning_player):
+                    raise WinningMoveFound(new_node.move)
+
+                nodes = nodes + [new_node]
 
-            # check if it is forced win
-            if (len(nodes) == 1 and
-                actual_game.is_finished and
-                game.player_move == actual_game.winning_player):
-                raise WinningMoveFound(new_node.move)
+            if self._rave:
+                played_moves = [(n.move, n.player) for n in nodes[1:]]
+                new_game = self._playout(actual_game, played_moves)
+                self.backprop(nodes, new_game)
+                self._pool.amaf_memory += self.backprop_amaf(nodes, new_game,
+                                                             played_moves)
+            else:
+                new_game = self._playout(actual_game)
+                self.backprop(nodes, new_game)
 
-            new_game =self._playout(actual_game)
-            self.backprop(nodes + [new_node], new_game)
+            self.stats.peak_nodes = max(self.stats.peak_nodes,
+                                        self._pool.size)
+            self.stats.peak_memory = max(self.stats.peak_memory,
+                                         self._pool.memory)
             iter_count += 1
+            self.stats.iterations = iter_count
             logging.debug("Finish iteration num. {}".format(iter_count))
 
         logging.debug("Simulation finished.")
         logging.debug("It took:{}".format(time.time() - start_time))
         logging.debug("It took: {} iterations".format(iter_count))
+        logging.debug(self.stats)
 
     def _get_winning_move(self, root_node: UTCNode) -> BoardCoord:
         """
@@ -210,12 +556,25 @@ class UTC:
         return top_node.move
 
     def get_move(self, game: Game) -> BoardCoord:
+        # recycle nodes of the previous search
+        if self.root_node is not None:
+            self._pool.release(self.root_node)
+        self.root_node = None
+        self.stats = SearchStats()
+
+        if self._opening_book is not None:
+            move = self._opening_book.get_move(game)
+            if move is not None:
+                logging.debug("Opening book hit: {}".format(move))
+                return move
+
         if game.player_move == PlayerType.CIRCLE:
             player_move = PlayerType.CROSS
         else:
             player_move = PlayerType.CIRCLE
 
-        root_node = UTCNode(None, [], player_move)
+        root_node = self._pool.acquire(None, player_move)
+        self.root_node = root_node
 
         try:
             self._simulation(root_node, game.clone())
@@ -226,17 +585,63 @@ class UTC:
 
         return self._get_winning_move(root_node)
 
+    @staticmethod
+    def _get_reward(player: PlayerType,
+                    winning_player: Optional[PlayerType]) -> float:
+        if winning_player == player:
+            return 1
+        elif winning_player is None:
+            return 0.5
+        return -1
+
     @staticmethod
     def backprop(nodes: UTCNodes, game):
         logging.debug("Backpropagating stats.")
         for node in nodes:
             node.n += 1
+            node.w += UTC._get_reward(node.player, game.winning_player)
 
-            if game.winning_player == node.player:
-                node.w += 1
-            elif game.winning_player is None:
-                node.w += 0.5
-            else:
-                node.w -= 1
+    @staticmethod
+    def backprop_amaf(nodes: UTCNodes, game,
+                      played_moves: PlayedMoves) -> int:
+        """
+        Update AMAF stats of all nodes on the selection path, returns
+        memory of the new entries in bytes.
+
+        Node keeps stats of every move played later in the simulation by the
+        player moving from the node, expanded or not, so new children start
+        with the stats already collected. played_moves[i] is the move
+        leading to nodes[i + 1] followed by the playout moves.
+        """
+        logging.debug("Backpropagating AMAF stats.")
+        rewards = {p: UTC._get_reward(p, game.winning_player)
+                   for p in PlayerType}
+        later_moves = played_moves[len(nodes) - 1:]
+        new_memory = 0
+
+        for i in range(len(nodes) - 1, -1, -1):
+            node = nodes[i]
+            if node.amaf is None:
+                node.amaf = {}
+            amaf_size = len(node.amaf)
+            dict_memory = sys.getsizeof(node.amaf)
+
+            for move, player in later_moves:
+                if player == node.player:
+                    continue
+                stats = node.amaf.get(move)
+                if stats is None:
+                    node.amaf[move] = [1, rewards[player]]
+                else:
+                    stats[0] += 1
+                    stats[1] += rewards[player]
+
+            new_memory += sys.getsizeof(node.amaf) - dict_memory +\
+                (len(node.amaf) - amaf_size) * UTCNodePool.AMAF_ENTRY_MEMORY
+
+            if i > 0:
+                later_moves.append(played_moves[i - 1])
+
+        return new_memory
 
 #eof
\ No newline at end of file
@@ -2,9 +2,12 @@
 
 import unittest2
 import random
+import tracemalloc
+import gc
 from board import BoardSpec
-from utc import UTC
-from game import Game
+from utc import UTC, UTCNode
+from game import Game, PlayerType
+from move_prior import MovePrior
 
 __author__ = 'Tomas Novacik'
 
@@ -54,4 +57,194 @@ class UtcTest(unittest2.TestCase):
 
         assert move == (0, 2)
 
+    def test_rave_finding_last_move(self):
+        board_spec = BoardSpec(3, 3, 3)
+        game = Game(board_spec = board_spec)
+        game.start()
+
+        for move in [(1, 0), (0, 0), (2, 1), (1, 1), (0, 1), (2, 0), (1, 2)]:
+            game.move(*move)
+
+        utc = UTC(iteration_limit=100, rave=True)
+        move = utc.get_move(game)
+
+        assert move == (0, 2)
+
+    def test_rave_value(self):
+        utc = UTC(rave=True, rave_equivalence=100)
+        parent = UTCNode(None, [], PlayerType.CROSS)
+        node = UTCNode((0, 0), [], PlayerType.CIRCLE)
+        node.n, node.w = 100, 20
+
+        # no AMAF stats - plain UCT value
+        self.assertAlmostEqual(utc._get_value(node, parent), 0.2)
+
+        parent.amaf = {(0, 0): [50, 40]}
+
+        # beta = sqrt(k / (3n + k)) = 0.5 for n == k
+        self.assertAlmostEqual(utc._get_value(node, parent),
+                               0.5 * 0.2 + 0.5 * 0.8)
+
+        node.n, node.w = 10000, 2000
+        beta = (100 / (3 * 10000 + 100)) ** 0.5
+        self.assertAlmostEqual(utc._get_value(node, parent),
+                               (1 - beta) * 0.2 + beta * 0.8)
+        # AMAF is ignored without RAVE
+        self.assertAlmostEqual(UTC()._get_value(node, parent), 0.2)
+
+    def test_backprop_amaf(self):
+        root = UTCNode(None, [], PlayerType.CROSS)
+        first = UTCNode((0, 0), [], PlayerType.CIRCLE)
+        root.children = [first]
+
+        game = Game()
+        game.winning_player = PlayerType.CIRCLE
+
+        played_moves = [((0, 0), PlayerType.CIRCLE),
+                        ((2, 2), PlayerType.CROSS),
+                        ((1, 1), PlayerType.CIRCLE)]
+        UTC.backprop_amaf([root, first], game, played_moves)
+
+        # not expanded moves are kept as well, opponent moves are skipped
+        self.assertEqual(root.amaf, {(0, 0): [1, 1], (1, 1): [1, 1]})
+        self.assertEqual(first.amaf, {(2, 2): [1, -1]})
+
+    def test_rave_expands_best_amaf_move(self):
+        game = Game(board_spec=BoardSpec(3, 3, 3))
+        game.start()
+        game.move(1, 1)
+
+        node = UTCNode((1, 1), [], PlayerType.CIRCLE)
+        node.amaf = {m: [10, -0.5] for m in game.available_moves}
+        node.amaf[(2, 0)] = [10, 0.9]
+
+        new_node = UTC(rave=True)._expand(node, game)
+
+        self.assertEqual(new_node.move, (2, 0))
+
+    def _get_depth(self, node):
+        return 1 + max([self._get_depth(c) for c in node.children], default=0)
+
+    def test_rave_deepens_search(self):
+        game = Game()
+        game.start()
+        game.move(5, 5)
+
+        utc = UTC(iteration_limit=1000)
+        utc.get_move(game)
+        ucb_depth = self._get_depth(utc.root_node)
+
+        random.seed(1)
+        utc = UTC(iteration_limit=1000, rave=True)
+        utc.get_move(game)
+        root_node = utc.root_node
+
+        # moves below the root are chosen by AMAF stats instead of waiting
+        # for all the siblings to be expanded
+        self.assertGreater(self._get_depth(root_node), ucb_depth)
+        self.assertTrue(any(c.is_expandable and c.children
+                            for c in root_node.children))
+
+    def _count_nodes(self, node):
+        return 1 + sum(self._count_nodes(c) for c in node.children)
+
+    def test_node_budget(self):
+        game = Game(board_spec=BoardSpec(5, 5, 4))
+        game.start()
+
+        utc = UTC(iteration_limit=300, max_nodes=60)
+        # second search recycles nodes of the first one
+        game.move(*utc.get_move(game))
+        utc.get_move(game)
+
+        self.assertLessEqual(utc.stats.peak_nodes, 60)
+        self.assertGreater(utc.stats.pruned_nodes, 0)
+        self.assertGreater(utc.stats.peak_memory, 0)
+        self.assertEqual(utc.stats.iterations, 300)
+        self.assertEqual(sum(c.n for c in utc.root_node.children), 300)
+        self.assertLessEqual(self._count_nodes(utc.root_node), 60)
+
+    def test_node_budget_deepens_existing_nodes(self):
+        game = Game()
+        game.start()
+        game.move(5, 5)
+
+        # budget smaller than the root branching factor
+        utc = UTC(iteration_limit=500, max_nodes=40)
+        utc.get_move(game)
+        root_node = utc.root_node
+
+        # every iteration after the budget was hit still visits a child
+        self.assertEqual(len(root_node.children), 39)
+        self.assertEqual(sum(c.n for c in root_node.children), 500)
+        self.assertGreater(max(c.n for c in root_node.children), 1)
+
+    def test_invalid_node_budget(self):
+        with self.assertRaises(ValueError):
+            UTC(max_nodes=1)
+
+    def _get_tree_memory(self, utc, game):
+        """Memory of the search tree kept after the search by tracemalloc"""
+        tracemalloc.start()
+        try:
+            utc.get_move(game)
+            gc.collect()
+            memory, _ = tracemalloc.get_traced_memory()
+            utc.root_node = None
+            utc._pool = None
+            gc.collect()
+            return memory - tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    def test_peak_memory(self):
+        for kwargs in [dict(prior=MovePrior()), dict(rave=True)]:
+            game = Game(board_spec=BoardSpec(8, 8, 5))
+            game.start()
+            game.move(4, 4)
+
+            utc = UTC(iteration_limit=200, **kwargs)
+            tree_memory = self._get_tree_memory(utc, game)
+
+            # tree only grows without a budget
+            self.assertGreater(utc.stats.peak_memory, tree_memory * 0.8)
+            self.assertLess(utc.stats.peak_memory, tree_memory * 1.25)
+
+    def test_peak_memory_puct_node_budget(self):
+        game = Game(board_spec=BoardSpec(8, 8, 5))
+        game.start()
+        game.move(4, 4)
+
+        utc = UTC(iteration_limit=500, max_nodes=80, prior=MovePrior())
+        tree_memory = self._get_tree_memory(utc, game)
+
+        self.assertGreater(utc.stats.pruned_nodes, 0)
+        self.assertGreater(utc.stats.peak_memory, tree_memory * 0.8)
+        # untried moves are stored compactly - node and 63 moves
+        self.assertLess(utc.stats.peak_memory, 80 * 2000)
+
+    def test_memory_budget(self):
+        game = Game(board_spec=BoardSpec(8, 8, 5))
+        game.start()
+        game.move(4, 4)
+
+        utc = UTC(iteration_limit=500, max_memory=40000, prior=MovePrior())
+        utc.get_move(game)
+
+        self.assertGreater(utc.stats.pruned_nodes, 0)
+        # budget may be exceeded by a single expansion only
+        self.assertLess(utc.stats.peak_memory, 40000 + 2000)
+        self.assertEqual(sum(c.n for c in utc.root_node.children), 500)
+
+    def test_node_budget_puct(self):
+        game = Game(board_spec=BoardSpec(5, 5, 4))
+        game.start()
+        game.move(2, 2)
+
+        utc = UTC(iteration_limit=200, max_nodes=30, prior=MovePrior())
+        move = utc.get_move(game)
+
+        self.assertIn(move, game.available_moves)
+        self.assertLessEqual(self._count_nodes(utc.root_node), 30)
+
 # eof